@@ -1,10 +1,18 @@
+import asyncio
+import copy
+import hashlib
 import os
-from dataclasses import dataclass
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
 from enum import Enum
 from math import ceil
-from typing import Any, Optional
+from typing import Any, Iterator, Optional
 
+import anthropic
+import httpx
 import numpy as np
+import openai
+import pyarrow as pa
 from anthropic import Anthropic, AsyncAnthropic
 from cohere import AsyncClient, Client
 from deepeval import evaluate
@@ -12,17 +20,25 @@ from deepeval.evaluate import TestResult
 from deepeval.metrics import BaseMetric, GEval
 from deepeval.models.base_model import DeepEvalBaseLLM
 from deepeval.test_case import LLMTestCase, LLMTestCaseParams
+from deepeval.utils import get_or_create_event_loop
+from loguru import logger
 from openai import AsyncAzureOpenAI, AzureOpenAI
+from torch import cuda
 from tqdm import tqdm
 from tqdm.asyncio import tqdm_asyncio
 
 from src.database.weaviate_interface_v4 import WeaviateWCS
+from src.llm.batch_client import BatchLLMClient
 from src.llm.llm_interface import LLM
 from src.llm.prompt_templates import (
     create_context_blocks,
     generate_prompt_series,
     huberman_system_message,
 )
+from src.llm.rate_limiter import AsyncTokenBucket, estimate_tokens
+from src.llm.response_cache import ResponseCache
+from src.llm.retry import retry_on_transient_error
+from src.llm.semantic_cache import SemanticCache
 from src.reranker import ReRanker
 
 
@@ -31,38 +47,159 @@ class CustomApiKeyEnum(Enum):
     anthropic = "ANTHROPIC_API_KEY"
 
 
+# cohere clients take retry settings per request instead of in the constructor
+COHERE_NO_RETRIES = {"max_retries": 0}
+
+# connection pool limits for the shared async client of each custom evaluation model
+ASYNC_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+
+class BatchRequestError(RuntimeError):
+    """Raised for a grader prompt whose request errored or expired inside a batch job."""
+
+
+def _raise_task_error(tasks: list[asyncio.Task]) -> None:
+    """
+    Re-raises the first error of the finished tasks. BatchRequestErrors are not
+    raised, they only fail the grading of a single test case.
+    """
+    for task in tasks:
+        if task.done() and not task.cancelled():
+            error = task.exception()
+            if error is not None and not isinstance(error, BatchRequestError):
+                raise error
+
+
+async def _acancel_tasks(tasks: list[asyncio.Task]) -> None:
+    """Cancels the unfinished tasks and waits until they have ended."""
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class _BatchPromptCollector:
+    """
+    Collects prompts from concurrent a_generate calls so that they can be resolved
+    together with a single batch job instead of one request per prompt.
+
+    The collector counts down the tasks that may still submit a prompt: ready is
+    set once every unfinished task is waiting on a submitted prompt, or once all
+    tasks have finished (take then returns an empty list).
+    """
+
+    def __init__(self, num_tasks: int) -> None:
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._num_active = num_tasks
+        self.ready = asyncio.Event()
+        self._check_ready()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def _check_ready(self) -> None:
+        if self._num_active <= 0 or len(self._pending) >= self._num_active:
+            self.ready.set()
+
+    async def submit(self, prompt: str) -> str:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((prompt, future))
+        self._check_ready()
+        return await future
+
+    def task_done(self, _task: asyncio.Task | None = None) -> None:
+        """Done callback for the tasks that submit prompts to this collector."""
+        self._num_active -= 1
+        self._check_ready()
+
+    def take(self) -> list[tuple[str, asyncio.Future]]:
+        pending, self._pending = self._pending, []
+        self.ready.clear()
+        return pending
+
+
 class CustomCohere(DeepEvalBaseLLM):
     """
     Creates a custom evaluation model interface that uses the Cohere API
     for evaluation of metrics.
     """
 
-    def __init__(self, model: str, api_key: str | None = None) -> None:
+    # rate limits are read from COHERE_RPM_LIMIT and COHERE_TPM_LIMIT
+    rate_limit_env_prefix = "COHERE"
+
+    def __init__(
+        self,
+        model: str,
+        api_key: str | None = None,
+        rate_limiter: AsyncTokenBucket | None = None,
+        cache: ResponseCache | None = None,
+    ) -> None:
         self.model = model
         self._api_key = _handle_api_key(CustomApiKeyEnum.cohere, api_key)
+        self.rate_limiter = rate_limiter
+        self.cache = cache if cache else ResponseCache()
+        self._sync_client = None
+        self._async_http_client: httpx.AsyncClient | None = None
+        self._async_client = self._create_async_client()
+
+    def _create_async_client(self) -> AsyncClient:
+        self._async_http_client = httpx.AsyncClient(
+            limits=ASYNC_HTTP_LIMITS, timeout=300
+        )
+        return AsyncClient(api_key=self._api_key, httpx_client=self._async_http_client)
 
     def load_model(self, async_mode: bool = False) -> Client | AsyncClient:  # type: ignore
         if async_mode:
-            return AsyncClient(api_key=self._api_key)
-        return Client(api_key=self._api_key)
+            if self._async_client is None:
+                self._async_client = self._create_async_client()
+            return self._async_client
+        if self._sync_client is None:
+            self._sync_client = Client(api_key=self._api_key)
+        return self._sync_client
+
+    def _cache_key(self, prompt: str) -> bytes:
+        return ResponseCache.make_key(prompt, self.model, "cohere", max_tokens=1024)
 
+    @retry_on_transient_error
     def generate(self, prompt: str) -> str:
+        key = self._cache_key(prompt)
+        if cached := self.cache.get(key):
+            return cached
         client = self.load_model()
-        response = client.chat(message=prompt, model=self.model, max_tokens=1024)
+        response = client.chat(
+            message=prompt,
+            model=self.model,
+            max_tokens=1024,
+            request_options=COHERE_NO_RETRIES,
+        )
         if response:
+            self.cache.set(key, response.text)
             return response.text
         return "No message returned"
 
+    @retry_on_transient_error
     async def a_generate(self, prompt: str) -> str:
+        key = self._cache_key(prompt)
+        if cached := self.cache.get(key):
+            return cached
+        if self.rate_limiter:
+            await self.rate_limiter.acquire(estimate_tokens(prompt) + 1024)
         aclient = self.load_model(async_mode=True)
-        response = await aclient.chat(message=prompt, model=self.model, max_tokens=1024)  # type: ignore
+        response = await aclient.chat(message=prompt, model=self.model, max_tokens=1024, request_options=COHERE_NO_RETRIES)  # type: ignore
         if response:
+            self.cache.set(key, response.text)
             return response.text
         return "No message returned"
 
     def get_model_name(self) -> str:
         return self.model
 
+    async def aclose(self) -> None:
+        """Closes the shared async client, a new one is created on next use."""
+        if self._async_http_client is not None:
+            await self._async_http_client.aclose()
+        self._async_http_client = None
+        self._async_client = None
+
 
 class CustomAnthropic(DeepEvalBaseLLM):
     """
@@ -70,16 +207,51 @@ class CustomAnthropic(DeepEvalBaseLLM):
     for evaluation of metrics.
     """
 
-    def __init__(self, model: str, api_key: str | None = None):
+    # rate limits are read from ANTHROPIC_RPM_LIMIT and ANTHROPIC_TPM_LIMIT
+    rate_limit_env_prefix = "ANTHROPIC"
+
+    def __init__(
+        self,
+        model: str,
+        api_key: str | None = None,
+        rate_limiter: AsyncTokenBucket | None = None,
+        cache: ResponseCache | None = None,
+    ):
         self.model = model
         self._api_key = _handle_api_key(CustomApiKeyEnum.anthropic, api_key)
+        self.rate_limiter = rate_limiter
+        self.cache = cache if cache else ResponseCache()
+        # set by batch_prompts to route a_generate through the Message Batches API
+        self._batch_collector: _BatchPromptCollector | None = None
+        self._sync_client = None
+        self._async_http_client: httpx.AsyncClient | None = None
+        self._async_client = self._create_async_client()
+
+    def _create_async_client(self) -> AsyncAnthropic:
+        self._async_http_client = anthropic.DefaultAsyncHttpxClient(
+            limits=ASYNC_HTTP_LIMITS
+        )
+        return AsyncAnthropic(
+            api_key=self._api_key, http_client=self._async_http_client, max_retries=0
+        )
 
     def load_model(self, async_mode: bool = False) -> AsyncAnthropic | Anthropic:  # type: ignore
         if async_mode:
-            return AsyncAnthropic(api_key=self._api_key)
-        return Anthropic(api_key=self._api_key)
+            if self._async_client is None:
+                self._async_client = self._create_async_client()
+            return self._async_client
+        if self._sync_client is None:
+            self._sync_client = Anthropic(api_key=self._api_key, max_retries=0)
+        return self._sync_client
+
+    def _cache_key(self, prompt: str) -> bytes:
+        return ResponseCache.make_key(prompt, self.model, "anthropic", max_tokens=1024)
 
+    @retry_on_transient_error
     def generate(self, prompt: str) -> str:
+        key = self._cache_key(prompt)
+        if cached := self.cache.get(key):
+            return cached
         client = self.load_model()
         message = client.messages.create(
             max_tokens=1024,
@@ -92,10 +264,26 @@ class CustomAnthropic(DeepEvalBaseLLM):
             model=self.model,
         )
         if message:
+            self.cache.set(
+                key,
+                message.content[0].text,
+                message.usage.input_tokens,
+                message.usage.output_tokens,
+            )
             return message.content[0].text
         return "no message returned"
 
+    @retry_on_transient_error
     async def a_generate(self, prompt: str) -> str:
+        key = self._cache_key(prompt)
+        if cached := self.cache.get(key):
+            return cached
+        if self._batch_collector is not None:
+            text = await self._batch_collector.submit(prompt)
+            self.cache.set(key, text)
+            return text
+        if self.rate_limiter:
+            await self.rate_limiter.acquire(estimate_tokens(prompt) + 1024)
         aclient = self.load_model(async_mode=True)
         message = await aclient.messages.create(  # type: ignore
             max_tokens=1024,
@@ -108,31 +296,122 @@ class CustomAnthropic(DeepEvalBaseLLM):
             model=self.model,
         )
         if message:
+            self.cache.set(
+                key,
+                message.content[0].text,
+                message.usage.input_tokens,
+                message.usage.output_tokens,
+            )
             return message.content[0].text
         return "no message returned"
 
+    @contextmanager
+    def batch_prompts(self, num_tasks: int) -> Iterator[_BatchPromptCollector]:
+        """
+        Routes a_generate calls made inside the context through the returned
+        collector instead of live requests. num_tasks is the number of concurrent
+        tasks that will submit prompts, the caller flushes the collector with
+        a_batch_generate whenever collector.ready is set.
+        """
+        if self._batch_collector is not None:
+            raise RuntimeError(
+                f"{self.model} is already collecting prompts for a batch job"
+            )
+        collector = _BatchPromptCollector(num_tasks)
+        self._batch_collector = collector
+        try:
+            yield collector
+        finally:
+            self._batch_collector = None
+
+    def batch_generate(
+        self, prompts: list[str], poll_interval: int = 60
+    ) -> list[str | None]:
+        """Synchronous version of a_batch_generate."""
+        loop = get_or_create_event_loop()
+        return loop.run_until_complete(self.a_batch_generate(prompts, poll_interval))
+
+    async def a_batch_generate(
+        self, prompts: list[str], poll_interval: int = 60
+    ) -> list[str | None]:
+        """
+        Generates responses for all prompts with a single Anthropic Message Batches
+        job (50% cost reduction, separate rate limit pool) submitted through
+        BatchLLMClient. Waits until the job has ended and returns outputs in the
+        same order as prompts; requests that errored or expired inside the batch
+        are logged and returned as None.
+        """
+        batch_client = BatchLLMClient(
+            self.model, self._api_key, poll_interval=poll_interval
+        )
+        return await batch_client.abatch_chat_completion(
+            None, prompts, temperature=None, max_tokens=1024
+        )
+
     def get_model_name(self) -> str:
         return self.model
 
+    async def aclose(self) -> None:
+        """Closes the shared async client, a new one is created on next use."""
+        if self._async_http_client is not None:
+            await self._async_http_client.aclose()
+        self._async_http_client = None
+        self._async_client = None
+
 
 class CustomAzureOpenAI(DeepEvalBaseLLM):
-    def __init__(self, deployment_name: str) -> None:
+    # rate limits are read from AZURE_OPENAI_RPM_LIMIT and AZURE_OPENAI_TPM_LIMIT
+    rate_limit_env_prefix = "AZURE_OPENAI"
+
+    def __init__(
+        self,
+        deployment_name: str,
+        rate_limiter: AsyncTokenBucket | None = None,
+        cache: ResponseCache | None = None,
+    ) -> None:
         self.model = deployment_name
+        self.rate_limiter = rate_limiter
+        self.cache = cache if cache else ResponseCache()
+        # clients are created on first use so that missing AZURE_OPENAI_* environment
+        # variables only fail when the model is actually called
+        self._sync_client = None
+        self._async_http_client: httpx.AsyncClient | None = None
+        self._async_client: AsyncAzureOpenAI | None = None
+
+    def _create_async_client(self) -> AsyncAzureOpenAI:
+        self._async_http_client = openai.DefaultAsyncHttpxClient(
+            limits=ASYNC_HTTP_LIMITS
+        )
+        return AsyncAzureOpenAI(
+            azure_endpoint=os.environ["AZURE_OPENAI_ENDPOINT"],
+            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+            api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
+            http_client=self._async_http_client,
+            max_retries=0,
+        )
 
     def load_model(self, async_mode: bool = False) -> AzureOpenAI | AsyncAzureOpenAI:  # type: ignore
         if async_mode:
-            return AsyncAzureOpenAI(
+            if self._async_client is None:
+                self._async_client = self._create_async_client()
+            return self._async_client
+        if self._sync_client is None:
+            self._sync_client = AzureOpenAI(
                 azure_endpoint=os.environ["AZURE_OPENAI_ENDPOINT"],
                 api_key=os.getenv("AZURE_OPENAI_API_KEY"),
                 api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
+                max_retries=0,
             )
-        return AzureOpenAI(
-            azure_endpoint=os.environ["AZURE_OPENAI_ENDPOINT"],
-            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-            api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
-        )
+        return self._sync_client
+
+    def _cache_key(self, prompt: str) -> bytes:
+        return ResponseCache.make_key(prompt, self.model, "azure", max_tokens=1024)
 
+    @retry_on_transient_error
     def generate(self, prompt: str) -> str:
+        key = self._cache_key(prompt)
+        if cached := self.cache.get(key):
+            return cached
         client = self.load_model()
         completion = client.chat.completions.create(
             model=self.model,
@@ -145,10 +424,24 @@ class CustomAzureOpenAI(DeepEvalBaseLLM):
             max_tokens=1024,
         )
         if completion:
-            return completion.choices[0].message.content  # type: ignore
+            content = completion.choices[0].message.content
+            usage = completion.usage
+            self.cache.set(
+                key,
+                content,  # type: ignore
+                usage.prompt_tokens if usage else None,
+                usage.completion_tokens if usage else None,
+            )
+            return content  # type: ignore
         return "no message returned"
 
+    @retry_on_transient_error
     async def a_generate(self, prompt: str) -> str:
+        key = self._cache_key(prompt)
+        if cached := self.cache.get(key):
+            return cached
+        if self.rate_limiter:
+            await self.rate_limiter.acquire(estimate_tokens(prompt) + 1024)
         aclient = self.load_model(async_mode=True)
         completion = await aclient.chat.completions.create(  # type: ignore
             model=self.model,
@@ -161,12 +454,27 @@ class CustomAzureOpenAI(DeepEvalBaseLLM):
             max_tokens=1024,
         )
         if completion:
-            return completion.choices[0].message.content  # type: ignore
+            content = completion.choices[0].message.content
+            usage = completion.usage
+            self.cache.set(
+                key,
+                content,  # type: ignore
+                usage.prompt_tokens if usage else None,
+                usage.completion_tokens if usage else None,
+            )
+            return content  # type: ignore
         return "no message returned"
 
     def get_model_name(self) -> str:
         return self.model
 
+    async def aclose(self) -> None:
+        """Closes the shared async client, a new one is created on next use."""
+        if self._async_http_client is not None:
+            await self._async_http_client.aclose()
+        self._async_http_client = None
+        self._async_client = None
+
 
 def _handle_api_key(env_value: CustomApiKeyEnum, api_key: str | None = None) -> str:
     if not api_key:
@@ -219,7 +527,7 @@ class AnswerCorrectnessMetric(GEval):
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class EvalResponse:
     score: float
     reason: str
@@ -232,7 +540,45 @@ class EvalResponse:
     retrieval_context: Optional[list[str]] = None
 
     def to_dict(self) -> dict:
-        return self.__dict__
+        return asdict(self)
+
+
+def eval_responses_to_table(eval_responses: list[EvalResponse]) -> pa.Table:
+    """
+    Converts a list of EvalResponses into a columnar pyarrow Table for
+    downstream analysis. Verdicts are not included as their type varies by metric.
+    """
+    return pa.table(
+        {
+            "score": pa.array([r.score for r in eval_responses], pa.float64()),
+            "reason": pa.array([r.reason for r in eval_responses], pa.string()),
+            "metric": pa.array([r.metric for r in eval_responses], pa.string()),
+            "cost": pa.array([r.cost for r in eval_responses], pa.float64()),
+            "eval_model": pa.array(
+                [str(r.eval_model) for r in eval_responses], pa.string()
+            ),
+            "input": pa.array([r.input for r in eval_responses], pa.string()),
+            "actual_output": pa.array(
+                [r.actual_output for r in eval_responses], pa.string()
+            ),
+            "retrieval_context": pa.array(
+                [r.retrieval_context for r in eval_responses], pa.list_(pa.string())
+            ),
+        }
+    )
+
+
+def _total_cost(eval_responses: list[EvalResponse]) -> float | None:
+    """
+    Sums evaluation costs in a single pass, returns None if no response reported a cost.
+    """
+    total = 0.0
+    n = 0
+    for r in eval_responses:
+        if r.cost:
+            total += r.cost
+            n += 1
+    return total if n else None
 
 
 def load_eval_response(
@@ -264,22 +610,140 @@ def load_eval_response(
 
 
 class TestCaseGenerator:
-    def __init__(self, llm: LLM, retriever: WeaviateWCS, reranker: ReRanker) -> None:
+    """
+    Generates LLM Test Cases by running queries through retrieval, reranking and
+    the LLM under test.
+
+    Args:
+    -----
+    llm: LLM
+        LLM under test.
+    retriever: WeaviateWCS
+        Retriever used for hybrid search.
+    reranker: ReRanker
+        Reranker applied to the retrieved results.
+    semantic_cache_dir: str=None
+        If provided, enables semantic caching: near-duplicate queries (cosine
+        similarity >= 0.97) reuse cached hybrid search results and near-duplicate
+        queries over identical context (>= 0.99) reuse cached answers. Both caches
+        are persisted as Parquet files in this directory.
+    rate_limiter: AsyncTokenBucket=None
+        Paces live calls to the LLM under test. Defaults to a bucket built from the
+        LLM_RPM_LIMIT and LLM_TPM_LIMIT environment variables; if neither is set,
+        calls are not paced.
+    """
+
+    def __init__(
+        self,
+        llm: LLM,
+        retriever: WeaviateWCS,
+        reranker: ReRanker,
+        semantic_cache_dir: str | None = None,
+        rate_limiter: AsyncTokenBucket | None = None,
+    ) -> None:
         self.llm = llm
         self.retriever = retriever
         self.reranker = reranker
+        self.rate_limiter = rate_limiter or AsyncTokenBucket.from_env("LLM")
+        self.cache = ResponseCache()
+        self.retrieval_cache = None
+        self.answer_cache = None
+        if semantic_cache_dir:
+            os.makedirs(semantic_cache_dir, exist_ok=True)
+            self.retrieval_cache = SemanticCache(
+                self._embed_query,
+                threshold=0.97,
+                path=os.path.join(semantic_cache_dir, "retrieval_cache.parquet"),
+            )
+            self.answer_cache = SemanticCache(
+                self._embed_query,
+                threshold=0.99,
+                path=os.path.join(semantic_cache_dir, "answer_cache.parquet"),
+            )
+
+    def _embed_query(self, query: str) -> list[float]:
+        """Embeds a query with the retriever's embedding model."""
+        device = "cuda:0" if cuda.is_available() else "cpu"
+        return self.retriever._create_query_vector(query, device=device)
+
+    async def _aembed_queries(self, queries: list[str]) -> list[np.ndarray] | None:
+        """
+        Embeds every query once in worker threads, the embeddings are shared by the
+        retrieval and answer caches. Returns None if semantic caching is disabled.
+        """
+        cache = self.retrieval_cache or self.answer_cache
+        if cache is None:
+            return None
+        return await asyncio.gather(
+            *[asyncio.to_thread(cache.embed, query) for query in queries]
+        )
+
+    def _cached_hybrid_search(
+        self,
+        query: str,
+        collection_name: str,
+        limit: int,
+        embedding: np.ndarray | None = None,
+    ) -> list[dict]:
+        """Executes hybrid search, reusing results of near-duplicate queries if enabled."""
+        if self.retrieval_cache is None:
+            return self.retriever.hybrid_search(query, collection_name, limit=limit)  # type: ignore
+        namespace = f"{collection_name}|{limit}"
+        if embedding is None:
+            embedding = self.retrieval_cache.embed(query)
+        cached = self.retrieval_cache.get(query, namespace, embedding)
+        if cached is not None:
+            return cached
+        results = self.retriever.hybrid_search(query, collection_name, limit=limit)
+        self.retrieval_cache.set(query, results, namespace, embedding)
+        return results  # type: ignore
 
     def retrieve_results(
         self, queries: list[str], collection_name: str, limit: int = 200, top_k: int = 3
     ) -> list[dict]:
         results = [
-            self.retriever.hybrid_search(query, collection_name, limit=limit)
+            self._cached_hybrid_search(query, collection_name, limit)
             for query in tqdm(queries, "QUERIES", position=0, leave=True)
         ]
-        reranked = [
-            self.reranker.rerank(result, queries[i], top_k=top_k)
-            for i, result in enumerate(tqdm(results, "RERANKING"))
-        ]
+        if self.retrieval_cache is not None:
+            self.retrieval_cache.save()
+        reranked = self.reranker.rerank_many(list(zip(queries, results)), top_k=top_k)
+        return reranked
+
+    async def aretrieve_results(
+        self,
+        queries: list[str],
+        collection_name: str,
+        limit: int = 200,
+        top_k: int = 3,
+        embeddings: list[np.ndarray] | None = None,
+    ) -> list[dict]:
+        """
+        Asynchronous version of retrieve_results. The blocking hybrid_search calls
+        are executed concurrently in worker threads so that network I/O to Weaviate
+        overlaps across queries, then all results are reranked with a single
+        rerank_many call. Precomputed query embeddings can be passed in to avoid
+        embedding each query again for the retrieval cache.
+        """
+        embeddings = embeddings or [None] * len(queries)  # type: ignore
+        results = await tqdm_asyncio.gather(
+            *[
+                asyncio.to_thread(
+                    self._cached_hybrid_search,
+                    query,
+                    collection_name,
+                    limit,
+                    embedding,
+                )
+                for query, embedding in zip(queries, embeddings)  # type: ignore
+            ],
+            desc="QUERIES",
+        )
+        if self.retrieval_cache is not None:
+            self.retrieval_cache.save()
+        reranked = await asyncio.to_thread(
+            self.reranker.rerank_many, list(zip(queries, results)), top_k=top_k
+        )
         return reranked
 
     async def aget_actual_outputs(
@@ -287,18 +751,95 @@ class TestCaseGenerator:
         user_messages: list[str],
         temperature: float = 1.0,
         max_tokens: int = 500,
+        use_batch_api: bool = False,
+        use_prefix_cache: bool = True,
         **kwargs,
     ) -> list[str]:
-        tasks = [
-            self.llm.achat_completion(
+        """
+        Generates an answer for each user message using the system under test.
+
+        If use_batch_api is True and the LLM is an OpenAI or Anthropic model, all
+        messages are submitted as a single provider Batch API job (50% cost reduction,
+        separate rate limit pool) at the expense of latency (minutes to hours).
+        Otherwise every message is sent as a live, concurrent chat completion.
+
+        The system message is identical across all calls, if use_prefix_cache is True it
+        is marked as a cacheable prompt prefix for Anthropic models (OpenAI applies
+        prefix caching automatically) to lower cost and time to first token.
+
+        Responses are looked up in (and written to) the ResponseCache first, only cache
+        misses are sent to the LLM.
+        """
+        keys = [
+            ResponseCache.make_key(
+                f"{huberman_system_message}|{user_message}",
+                self.llm.model_name,
+                "litellm",
+                temperature,
+                max_tokens,
+            )
+            for user_message in user_messages
+        ]
+        responses = [self.cache.get(key) for key in keys]
+        misses = [i for i, response in enumerate(responses) if response is None]
+        if not misses:
+            return responses  # type: ignore
+        miss_messages = [user_messages[i] for i in misses]
+        if use_batch_api and BatchLLMClient.get_provider(self.llm.model_name):
+            batch_client = BatchLLMClient.from_llm(self.llm)
+            outputs = await batch_client.abatch_chat_completion(
                 huberman_system_message,
-                user_message,
+                miss_messages,
                 temperature=temperature,
                 max_tokens=max_tokens,
+                cache_system_message=use_prefix_cache,
+            )
+            # requests that failed or expired inside the batch are re-issued live
+            failed = [i for i, output in enumerate(outputs) if output is None]
+            if failed:
+                retried = await self._aget_live_outputs(
+                    [miss_messages[i] for i in failed],
+                    temperature,
+                    max_tokens,
+                    cache_system_message=use_prefix_cache,
+                    **kwargs,
+                )
+                for i, output in zip(failed, retried):
+                    outputs[i] = output
+        else:
+            outputs = await self._aget_live_outputs(
+                miss_messages,
+                temperature,
+                max_tokens,
+                cache_system_message=use_prefix_cache,
                 **kwargs,
             )
-            for user_message in user_messages
-        ]
+        for i, output in zip(misses, outputs):
+            responses[i] = output
+            if output:
+                self.cache.set(keys[i], output)
+        return responses  # type: ignore
+
+    async def _aget_live_outputs(
+        self, user_messages: list[str], temperature: float, max_tokens: int, **kwargs
+    ) -> list[str]:
+        """Sends each user message as a live, rate limited chat completion."""
+        system_tokens = estimate_tokens(huberman_system_message)
+
+        async def _acall(user_message: str) -> str:
+            if self.rate_limiter:
+                await self.rate_limiter.acquire(
+                    system_tokens + estimate_tokens(user_message) + max_tokens
+                )
+            return await self.llm.achat_completion(
+                huberman_system_message,
+                user_message,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **kwargs,
+            )  # type: ignore
+
+        tasks = [_acall(user_message) for user_message in user_messages]
         responses = await tqdm_asyncio.gather(*tasks, desc="LLM CALLS")
         return responses
 
@@ -308,41 +849,120 @@ class TestCaseGenerator:
         collection_name: str,
         retrieve_limit: int = 200,
         top_k: int = 3,
+        use_batch_api: bool = False,
     ) -> list[LLMTestCase]:
         """
         Creates a list of LLM Test Cases based on query retrievals.
         """
-        reranked_results = self.retrieve_results(
-            queries, collection_name, retrieve_limit, top_k
+        embeddings = await self._aembed_queries(queries)
+        reranked_results = await self.aretrieve_results(
+            queries, collection_name, retrieve_limit, top_k, embeddings
         )
         user_messages = [
-            generate_prompt_series(queries[i], rerank)
-            for i, rerank in enumerate(reranked_results)
-        ]
-        actual_outputs = await self.aget_actual_outputs(user_messages)
-        retrieval_contexts = [
-            create_context_blocks(rerank) for rerank in reranked_results
+            generate_prompt_series(query, rerank)
+            for query, rerank in zip(queries, reranked_results)
         ]
+        if self.answer_cache is None:
+            actual_outputs = await self.aget_actual_outputs(
+                user_messages, use_batch_api=use_batch_api
+            )
+        else:
+            actual_outputs = await self._aget_semantic_cached_outputs(
+                queries, reranked_results, user_messages, embeddings, use_batch_api  # type: ignore
+            )
         test_cases = [
-            LLMTestCase(input=input, actual_output=output, retrieval_context=context)
-            for input, output, context in list(
-                zip(queries, actual_outputs, retrieval_contexts)
+            LLMTestCase(
+                input=query,
+                actual_output=output,
+                retrieval_context=create_context_blocks(rerank),
             )
+            for query, output, rerank in zip(queries, actual_outputs, reranked_results)
         ]
         return test_cases
 
+    async def _aget_semantic_cached_outputs(
+        self,
+        queries: list[str],
+        reranked_results: list[list[dict]],
+        user_messages: list[str],
+        embeddings: list[np.ndarray],
+        use_batch_api: bool = False,
+    ) -> list[str]:
+        """
+        Reuses cached answers for near-duplicate queries that were answered over the
+        exact same retrieval context, only cache misses are sent to the LLM.
+        embeddings are the query embeddings already computed for the retrieval cache.
+        """
+        namespaces = [
+            hashlib.sha256(
+                "|".join([self.llm.model_name, *create_context_blocks(rerank)]).encode()
+            ).hexdigest()
+            for rerank in reranked_results
+        ]
+        outputs = [
+            self.answer_cache.get(query, namespace, embedding)  # type: ignore
+            for query, namespace, embedding in zip(queries, namespaces, embeddings)
+        ]
+        misses = [i for i, output in enumerate(outputs) if output is None]
+        if misses:
+            miss_outputs = await self.aget_actual_outputs(
+                [user_messages[i] for i in misses], use_batch_api=use_batch_api
+            )
+            for i, output in zip(misses, miss_outputs):
+                outputs[i] = output
+                if output:
+                    self.answer_cache.set(  # type: ignore
+                        queries[i], output, namespaces[i], embeddings[i]
+                    )
+            self.answer_cache.save()  # type: ignore
+        return outputs
+
 
 class PollingEvaluation:
-    def __init__(self, batch_size: int = 10):
+    """
+    Evaluates answer correctness with multiple evaluation models ("polling evaluation").
+
+    Args:
+    -----
+    batch_size: int=10
+        Number of test cases graded concurrently per model in each batch.
+    batch_api_min_test_cases: int=50
+        CustomAnthropic evaluation models are routed through the Anthropic Message
+        Batches API when there are more than this many test cases. Set to None to
+        always use live requests.
+    """
+
+    def __init__(self, batch_size: int = 10, batch_api_min_test_cases: int | None = 50):
         if batch_size <= 1:
             raise ValueError("Batch size must be greater than 1")
         self.batch_size = batch_size
+        self.batch_api_min_test_cases = batch_api_min_test_cases
+        self._rate_limiters: dict[str, AsyncTokenBucket | None] = {}
+        self._metric_by_model: dict[
+            tuple[str | DeepEvalBaseLLM, float], AnswerCorrectnessMetric
+        ] = {}
+
+    def _get_metric(
+        self, model: str | DeepEvalBaseLLM, threshold: float
+    ) -> AnswerCorrectnessMetric:
+        """
+        Returns the AnswerCorrectnessMetric for model and threshold, creating and
+        caching it on first use so repeated batches reuse the same instance.
+        Custom models are keyed on the instance, not the model name, because two
+        instances of the same model can hold different api keys or rate limiters.
+        """
+        key = (model, threshold)
+        if key not in self._metric_by_model:
+            self._metric_by_model[key] = AnswerCorrectnessMetric(
+                evaluation_model=model, threshold=threshold
+            )
+        return self._metric_by_model[key]
 
     def evaluate_answer_correctness(
         self,
         test_cases: list[LLMTestCase],
         model: str | DeepEvalBaseLLM,
-        threshhold: float = 0.8,
+        threshold: float = 0.8,
         return_raw: bool = False,
     ) -> dict[str, Any]:
         """
@@ -350,7 +970,7 @@ class PollingEvaluation:
         over a list of test cases.
         """
         model_name = model if isinstance(model, str) else model.model
-        ac_metric = AnswerCorrectnessMetric(model=model, threshold=threshhold)
+        ac_metric = self._get_metric(model, threshold)
         responses = evaluate(
             test_cases,
             [ac_metric],
@@ -363,14 +983,122 @@ class PollingEvaluation:
         eval_responses = [
             load_eval_response(r.metrics_data[0], r) for r in responses.test_results
         ]
-        scores = [r.score for r in eval_responses]
-        cost = [r.cost for r in eval_responses if r.cost]
-        cost = sum(cost) if any(cost) else "N/A"
+        return self._results_dict(model_name, eval_responses)
+
+    async def aevaluate_answer_correctness(
+        self,
+        test_cases: list[LLMTestCase],
+        model: str | DeepEvalBaseLLM,
+        threshold: float = 0.8,
+        show_indicator: bool = False,
+    ) -> dict[str, Any]:
+        """
+        Asynchronous version of evaluate_answer_correctness. Test cases are graded
+        concurrently, each with its own metric instance because deepeval metrics
+        store score and reason state on the instance (shallow copies of the cached
+        metric). Results are consumed as soon as each test case finishes grading and
+        the metric instance is released. If grading a test case fails, the remaining
+        test cases are cancelled and the error is raised.
+        """
+        model_name = model if isinstance(model, str) else model.model
+        ac_metric = self._get_metric(model, threshold)
+        metrics = [copy.copy(ac_metric) for _ in test_cases]
+
+        async def _ameasure(idx: int) -> int:
+            await metrics[idx].a_measure(  # type: ignore
+                test_cases[idx], _show_indicator=show_indicator
+            )
+            return idx
+
+        eval_responses: list[EvalResponse] = [None] * len(test_cases)  # type: ignore
+        tasks = [asyncio.create_task(_ameasure(i)) for i in range(len(test_cases))]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                idx = await next_result
+                eval_responses[idx] = load_eval_response(metrics[idx], test_cases[idx])  # type: ignore
+                metrics[idx] = None  # type: ignore
+        except BaseException:
+            await _acancel_tasks(tasks)
+            raise
+        return self._results_dict(model_name, eval_responses)
+
+    async def aevaluate_answer_correctness_batch(
+        self,
+        test_cases: list[LLMTestCase],
+        model: CustomAnthropic,
+        threshold: float = 0.8,
+        poll_interval: int = 60,
+    ) -> dict[str, Any]:
+        """
+        Version of aevaluate_answer_correctness that submits the grader prompts of all
+        test cases as Anthropic Message Batches jobs instead of live requests. Latency
+        is minutes to hours, in exchange for a 50% cost reduction and a separate rate
+        limit pool that leaves the interactive quota free for the system under test.
+        Test cases whose batch request errored or expired are scored NaN, so they are
+        excluded by the nan-aware reductions in apolling_evaluation. Any other error
+        (i.e. a failed batch job, an invalid api key or a CacheMissError in replay
+        mode) cancels the remaining test cases and is raised.
+        """
+        ac_metric = self._get_metric(model, threshold)
+        metrics = [copy.copy(ac_metric) for _ in test_cases]
+        with model.batch_prompts(len(test_cases)) as collector:
+            tasks = [
+                asyncio.create_task(metric.a_measure(test_case, _show_indicator=False))
+                for metric, test_case in zip(metrics, test_cases)
+            ]
+            for task in tasks:
+                task.add_done_callback(collector.task_done)
+            try:
+                # flush once every unfinished test case is blocked on its grader prompt
+                while True:
+                    await collector.ready.wait()
+                    _raise_task_error(tasks)
+                    pending = collector.take()
+                    if not pending:
+                        break
+                    outputs = await model.a_batch_generate(
+                        [prompt for prompt, _ in pending], poll_interval
+                    )
+                    for (_, future), output in zip(pending, outputs):
+                        if output is None:
+                            future.set_exception(
+                                BatchRequestError("Batch request errored or expired")
+                            )
+                        else:
+                            future.set_result(output)
+            except BaseException:
+                await _acancel_tasks(tasks)
+                raise
+        eval_responses = []
+        for metric, test_case, task in zip(metrics, test_cases, tasks):
+            error = task.exception()
+            if error is None:
+                eval_responses.append(load_eval_response(metric, test_case))
+                continue
+            logger.warning(f"Grading failed for input {test_case.input!r}: {error}")
+            eval_responses.append(
+                EvalResponse(
+                    score=float("nan"),
+                    reason=f"Grading failed: {error}",
+                    metric=metric.__class__.__name__,
+                    cost=None,  # type: ignore
+                    eval_model=model.model,
+                    input=test_case.input,
+                    actual_output=test_case.actual_output,
+                    retrieval_context=test_case.retrieval_context,
+                )
+            )
+        return self._results_dict(model.model, eval_responses)
+
+    def _results_dict(
+        self, model_name: str, eval_responses: list[EvalResponse]
+    ) -> dict[str, Any]:
+        results = eval_responses_to_table(eval_responses)
         results_dict = {
             "model": model_name,
-            "results": eval_responses,
-            "scores": scores,
-            "cost": cost,
+            "results": results,
+            "scores": results.column("score").to_numpy(),
+            "cost": _total_cost(eval_responses),
         }
         return results_dict
 
@@ -381,12 +1109,47 @@ class PollingEvaluation:
         show_eval_progress: bool = False,
     ) -> dict[str, Any]:
         """
-        Iteratively loops through list of models and executes deepeval evaluation function.
+        Synchronous wrapper around apolling_evaluation. If an event loop is already
+        running (i.e. in a Jupyter notebook or Streamlit) it is patched with nest_asyncio,
+        the same way deepeval's evaluate handles it; prefer awaiting apolling_evaluation
+        directly in that case. The shared async clients of custom evaluation models are
+        closed before returning.
+        """
+
+        async def _arun() -> dict[str, Any]:
+            try:
+                return await self.apolling_evaluation(
+                    test_cases, models, show_eval_progress
+                )
+            finally:
+                await self._aclose_models(models)
+
+        loop = get_or_create_event_loop()
+        return loop.run_until_complete(_arun())
+
+    async def apolling_evaluation(
+        self,
+        test_cases: list[LLMTestCase],
+        models: list[str | DeepEvalBaseLLM],
+        show_eval_progress: bool = False,
+    ) -> dict[str, Any]:
+        """
+        Loops through batches of test cases and executes the deepeval evaluation
+        for every model concurrently within each batch.
         This function implements "polling evaluation" wherein multiple model scores are
         crowdsourced vs. an evaluation that uses a single monolithic model.
 
-        Batch size no greater than 10 is recommended to avoid Rate Limit Errors, given that
-        there is no internal backoff/retry support for this function.
+        Custom evaluation models (CustomCohere, CustomAnthropic, CustomAzureOpenAI) without
+        a rate_limiter are assigned one token bucket per model that is shared across all
+        batches, so requests are paced instead of tripping Rate Limit Errors. Limits are
+        read from provider specific environment variables (i.e. ANTHROPIC_RPM_LIMIT and
+        ANTHROPIC_TPM_LIMIT), models of providers without configured limits are not paced.
+
+        When there are more than batch_api_min_test_cases test cases, CustomAnthropic
+        models grade all test cases through the Message Batches API, concurrently with
+        the batched live evaluation of the other models.
+
+        Per model results are returned as a columnar pyarrow Table, see eval_responses_to_table.
         """
         test_cases = self._check_test_case_types(test_cases)
         num_batches = ceil(len(test_cases) / self.batch_size)
@@ -394,26 +1157,68 @@ class PollingEvaluation:
             model if isinstance(model, str) else model.model for model in models
         ]
         print(f"Model Names: {model_names}")
+        for model in models:
+            self._attach_rate_limiter(model)
         results_dict = {
-            name: {"results": [], "scores": [], "cost_per_batch": []}
-            for name in model_names
+            name: {"results": [], "cost_per_batch": []} for name in model_names
         }
-        for i in range(num_batches):
-            batch = test_cases[i * self.batch_size : (i + 1) * self.batch_size]
-            for model in tqdm(models, desc=f"Batch: {i + 1} of {num_batches}"):
-                model_name = model if isinstance(model, str) else model.model
-                model_results = self.evaluate_answer_correctness(
-                    batch, model, show_eval_progress, return_raw=False
-                )
-                results_dict[model_name]["results"].extend(model_results["results"])
-                results_dict[model_name]["scores"].extend(model_results["scores"])
-                results_dict[model_name]["cost_per_batch"].append(model_results["cost"])
-                print(f"Completed batch {i + 1} results for model: {model_name}")
-        model_scores = np.array(
-            [results_dict[model_name]["scores"] for model_name in model_names]
+        # failed or missing scores stay NaN and are excluded by the nan-aware reductions
+        model_scores = np.full((len(models), len(test_cases)), np.nan, dtype=np.float64)
+        use_batch_api = (
+            self.batch_api_min_test_cases is not None
+            and len(test_cases) > self.batch_api_min_test_cases
         )
-        mean_scores = np.mean(model_scores, axis=0)
-        evaluation_score = np.mean(mean_scores)
+        batch_api_idxs = [
+            idx
+            for idx, model in enumerate(models)
+            if use_batch_api and isinstance(model, CustomAnthropic)
+        ]
+        live_idxs = [idx for idx in range(len(models)) if idx not in batch_api_idxs]
+        batch_api_tasks = [
+            asyncio.create_task(
+                self.aevaluate_answer_correctness_batch(test_cases, models[idx])  # type: ignore
+            )
+            for idx in batch_api_idxs
+        ]
+        live_tasks: list[asyncio.Task] = []
+        try:
+            for i in tqdm(range(num_batches), desc="BATCHES"):
+                start = i * self.batch_size
+                batch = test_cases[start : start + self.batch_size]
+                live_tasks = [
+                    asyncio.create_task(
+                        self.aevaluate_answer_correctness(
+                            batch, models[idx], show_indicator=show_eval_progress
+                        )
+                    )
+                    for idx in live_idxs
+                ]
+                batch_results = await asyncio.gather(*live_tasks)
+                for model_idx, model_results in zip(live_idxs, batch_results):
+                    model_name = model_names[model_idx]
+                    end = start + len(batch)
+                    model_scores[model_idx, start:end] = model_results["scores"]
+                    results_dict[model_name]["results"].append(model_results["results"])
+                    results_dict[model_name]["cost_per_batch"].append(
+                        model_results["cost"]
+                    )
+            batch_api_results = await asyncio.gather(*batch_api_tasks)
+        except BaseException:
+            # stop Message Batches polling and live grading before the clients are closed
+            await _acancel_tasks([*batch_api_tasks, *live_tasks])
+            raise
+        for model_idx, model_results in zip(batch_api_idxs, batch_api_results):
+            model_name = model_names[model_idx]
+            model_scores[model_idx] = model_results["scores"]
+            results_dict[model_name]["results"].append(model_results["results"])
+            results_dict[model_name]["cost_per_batch"].append(model_results["cost"])
+        for model_idx, model_name in enumerate(model_names):
+            results_dict[model_name]["results"] = pa.concat_tables(
+                results_dict[model_name]["results"]
+            )
+            results_dict[model_name]["scores"] = model_scores[model_idx]
+        mean_scores = np.nanmean(model_scores, axis=0)
+        evaluation_score = float(np.nanmean(mean_scores))
         evaluation_results = {
             "responses": results_dict,
             "mean_scores": mean_scores,
@@ -421,6 +1226,31 @@ class PollingEvaluation:
         }
         return evaluation_results
 
+    async def _aclose_models(self, models: list[str | DeepEvalBaseLLM]) -> None:
+        """Closes the shared async clients of custom evaluation models."""
+        await asyncio.gather(
+            *[
+                model.aclose()
+                for model in models
+                if isinstance(model, (CustomCohere, CustomAnthropic, CustomAzureOpenAI))
+            ]
+        )
+
+    def _attach_rate_limiter(self, model: str | DeepEvalBaseLLM) -> None:
+        """
+        Assigns a shared per-model token bucket to custom evaluation models, built from
+        the rate limits configured for the model's provider (if any).
+        OpenAI model names (str) are graded by deepeval's native model and are not paced.
+        """
+        if not isinstance(model, (CustomCohere, CustomAnthropic, CustomAzureOpenAI)):
+            return
+        if model.rate_limiter is None:
+            if model.model not in self._rate_limiters:
+                self._rate_limiters[model.model] = AsyncTokenBucket.from_env(
+                    model.rate_limit_env_prefix
+                )
+            model.rate_limiter = self._rate_limiters[model.model]
+
     def _check_test_case_types(
         self, test_cases: list[LLMTestCase]
     ) -> list[LLMTestCase]:
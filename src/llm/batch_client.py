@@ -0,0 +1,243 @@
+import asyncio
+import json
+from typing import Any
+
+from anthropic import AsyncAnthropic
+from anthropic.types.message_create_params import MessageCreateParamsNonStreaming
+from anthropic.types.messages.batch_create_params import Request
+from loguru import logger
+from openai import AsyncOpenAI
+
+from src.llm.llm_interface import LLM
+from src.llm.retry import retry_on_transient_error
+
+
+@retry_on_transient_error
+async def _acall(fn, *args, **kwargs):
+    """Awaits a provider API call under the shared transient error retry policy."""
+    return await fn(*args, **kwargs)
+
+
+class BatchLLMClient:
+    """
+    Submits a list of chat completions as a single provider Batch API job
+    instead of one live request per prompt. Batch jobs are billed at a 50%
+    discount and draw from a separate (higher) rate limit pool, which makes
+    them a good fit for offline evaluation runs. Supported providers are
+    OpenAI (/v1/batches) and Anthropic (Message Batches).
+
+    Every API call (including each status poll of a job that can run for up to
+    24 hours) is retried on transient errors with retry_on_transient_error.
+
+    Args:
+    -----
+    model_name: str
+        Model name, using the same naming convention as the LLM class
+        i.e. "gpt-4o-mini" or "anthropic/claude-3-5-haiku-latest".
+    api_key: str
+        API key for the provider that serves model_name.
+    poll_interval: int=60
+        Number of seconds to wait between batch status checks.
+    completion_window: str="24h"
+        OpenAI batch completion window (ignored for Anthropic).
+    """
+
+    OPENAI_PREFIXES = ("gpt", "o1", "o3", "o4", "openai/")
+    ANTHROPIC_PREFIXES = ("claude", "anthropic/")
+
+    def __init__(
+        self,
+        model_name: str,
+        api_key: str,
+        poll_interval: int = 60,
+        completion_window: str = "24h",
+    ) -> None:
+        self.provider = self.get_provider(model_name)
+        if not self.provider:
+            raise ValueError(
+                f"Batch API is only supported for OpenAI and Anthropic models, received: {model_name}"
+            )
+        self.model_name = model_name.split("/", 1)[-1]
+        self._api_key = api_key
+        self.poll_interval = poll_interval
+        self.completion_window = completion_window
+
+    @classmethod
+    def from_llm(cls, llm: LLM, **kwargs) -> "BatchLLMClient":
+        """Creates a BatchLLMClient from an existing LLM instance."""
+        return cls(llm.model_name, llm._api_key, **kwargs)
+
+    @classmethod
+    def get_provider(cls, model_name: str) -> str | None:
+        """Returns the Batch API provider for a given model name or None if unsupported."""
+        if model_name.startswith(cls.OPENAI_PREFIXES):
+            return "openai"
+        if model_name.startswith(cls.ANTHROPIC_PREFIXES):
+            return "anthropic"
+        return None
+
+    async def abatch_chat_completion(
+        self,
+        system_message: str | None,
+        user_messages: list[str],
+        temperature: float | None = 0,
+        max_tokens: int = 500,
+        cache_system_message: bool = False,
+    ) -> list[str | None]:
+        """
+        Submits one batch job for all user_messages and polls until completion.
+        Outputs are returned in the same order as user_messages; requests that
+        failed or expired inside the batch are logged and returned as None so
+        that the caller can re-issue them.
+
+        If system_message is None, only the user messages are sent. If temperature
+        is None, the provider default temperature is used.
+
+        If cache_system_message is True, the system message is marked as a cacheable
+        prompt prefix for Anthropic (OpenAI caches identical prefixes automatically).
+        """
+        if self.provider == "openai":
+            outputs = await self._openai_batch(
+                system_message, user_messages, temperature, max_tokens
+            )
+        else:
+            outputs = await self._anthropic_batch(
+                system_message,
+                user_messages,
+                temperature,
+                max_tokens,
+                cache_system_message,
+            )
+        failed = [i for i in range(len(user_messages)) if i not in outputs]
+        if failed:
+            logger.warning(
+                f"{len(failed)} of {len(user_messages)} batch requests returned no output: {failed}"
+            )
+        return [outputs.get(i) for i in range(len(user_messages))]
+
+    async def _openai_batch(
+        self,
+        system_message: str | None,
+        user_messages: list[str],
+        temperature: float | None,
+        max_tokens: int,
+    ) -> dict[int, str]:
+        body: dict[str, Any] = {"model": self.model_name, "max_tokens": max_tokens}
+        if temperature is not None:
+            body["temperature"] = temperature
+        system = (
+            [{"role": "system", "content": system_message}] if system_message else []
+        )
+        lines = [
+            json.dumps(
+                {
+                    "custom_id": str(i),
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {
+                        **body,
+                        "messages": [
+                            *system,
+                            {"role": "user", "content": user_message},
+                        ],
+                    },
+                }
+            )
+            for i, user_message in enumerate(user_messages)
+        ]
+        async with AsyncOpenAI(api_key=self._api_key, max_retries=0) as client:
+            batch_file = await _acall(
+                client.files.create,
+                file=("batch.jsonl", "\n".join(lines).encode("utf-8")),
+                purpose="batch",
+            )
+            batch = await _acall(
+                client.batches.create,
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window=self.completion_window,
+            )
+            logger.info(f"Submitted OpenAI batch {batch.id} with {len(lines)} requests")
+            while batch.status not in ("completed", "failed", "expired", "cancelled"):
+                await asyncio.sleep(self.poll_interval)
+                batch = await _acall(client.batches.retrieve, batch.id)
+            if not batch.output_file_id and not batch.error_file_id:
+                raise RuntimeError(
+                    f"OpenAI batch {batch.id} ended with status: {batch.status}"
+                )
+            # failed requests are written to the error file, not the output file
+            if batch.error_file_id:
+                errors = await _acall(client.files.content, batch.error_file_id)
+                for line in errors.text.splitlines():
+                    if line.strip():
+                        record = json.loads(line)
+                        logger.warning(
+                            f"Request {record['custom_id']} failed: {record.get('error') or record.get('response')}"
+                        )
+            outputs = {}
+            if not batch.output_file_id:
+                return outputs
+            content = await _acall(client.files.content, batch.output_file_id)
+            text = content.text
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            response = record.get("response") or {}
+            if response.get("status_code") != 200:
+                logger.warning(
+                    f"Request {record['custom_id']} failed: {record.get('error')}"
+                )
+                continue
+            message = response["body"]["choices"][0]["message"]
+            outputs[int(record["custom_id"])] = message["content"]
+        return outputs
+
+    async def _anthropic_batch(
+        self,
+        system_message: str | None,
+        user_messages: list[str],
+        temperature: float | None,
+        max_tokens: int,
+        cache_system_message: bool = False,
+    ) -> dict[int, str]:
+        params: dict[str, Any] = {"model": self.model_name, "max_tokens": max_tokens}
+        if temperature is not None:
+            params["temperature"] = temperature
+        if system_message and cache_system_message:
+            params["system"] = [
+                {
+                    "type": "text",
+                    "text": system_message,
+                    "cache_control": {"type": "ephemeral"},
+                }
+            ]
+        elif system_message:
+            params["system"] = system_message
+        requests = [
+            Request(
+                custom_id=str(i),
+                params=MessageCreateParamsNonStreaming(
+                    **params, messages=[{"role": "user", "content": user_message}]
+                ),
+            )
+            for i, user_message in enumerate(user_messages)
+        ]
+        outputs = {}
+        async with AsyncAnthropic(api_key=self._api_key, max_retries=0) as client:
+            batch = await _acall(client.messages.batches.create, requests=requests)
+            logger.info(
+                f"Submitted Anthropic batch {batch.id} with {len(requests)} requests"
+            )
+            while batch.processing_status != "ended":
+                await asyncio.sleep(self.poll_interval)
+                batch = await _acall(client.messages.batches.retrieve, batch.id)
+            async for entry in await _acall(client.messages.batches.results, batch.id):
+                if entry.result.type != "succeeded":
+                    error = getattr(entry.result, "error", None)
+                    logger.warning(
+                        f"Request {entry.custom_id} {entry.result.type}: {error or ''}"
+                    )
+                    continue
+                outputs[int(entry.custom_id)] = entry.result.message.content[0].text  # type: ignore
+        return outputs
@@ -41,6 +41,7 @@ class LLM:
         max_tokens: int = 500,
         stream: bool = False,
         raw_response: bool = False,
+        cache_system_message: bool = False,
         **kwargs,
     ) -> str | CustomStreamWrapper | ModelResponse:
         """
@@ -60,8 +61,13 @@ class LLM:
             Whether to stream the response.
         raw_response: bool
             If True, returns the raw model response.
+        cache_system_message: bool
+            If True and the model is an Anthropic model, marks the system message as a
+            cacheable prompt prefix. OpenAI caches identical prefixes automatically.
         """
-        messages = self._create_message_block(system_message, user_message)
+        messages = self._create_message_block(
+            system_message, user_message, cache_system_message
+        )
         response = completion(
             model=self.model_name,
             messages=messages,
@@ -76,15 +82,29 @@ class LLM:
         return self._handle_response(response, raw_response)
 
     def _create_message_block(
-        self, system_message: str, user_message: str
-    ) -> list[dict[str, str]]:
+        self, system_message: str, user_message: str, cache_system_message: bool = False
+    ) -> list[dict]:
         """Creates a message block for the model."""
+        system_content: str | list[dict] = system_message
+        if cache_system_message and self.is_anthropic:
+            system_content = [
+                {
+                    "type": "text",
+                    "text": system_message,
+                    "cache_control": {"type": "ephemeral"},
+                }
+            ]
         messages = [
-            {"role": "system", "content": system_message},
+            {"role": "system", "content": system_content},
             {"role": "user", "content": user_message},
         ]
         return messages
 
+    @property
+    def is_anthropic(self) -> bool:
+        """True if the model is served by the Anthropic API."""
+        return self.model_name.startswith(("anthropic/", "claude"))
+
     def _handle_response(
         self, response: CustomStreamWrapper | ModelResponse, raw_response: bool
     ) -> str | CustomStreamWrapper | ModelResponse:
@@ -105,6 +125,7 @@ class LLM:
         max_tokens: int = 500,
         stream: bool = False,
         raw_response: bool = False,
+        cache_system_message: bool = False,
         **kwargs,
     ) -> str | CustomStreamWrapper | ModelResponse:
         """
@@ -124,9 +145,14 @@ class LLM:
             Whether to stream the response.
         raw_response: bool
             If True, returns the raw model response.
+        cache_system_message: bool
+            If True and the model is an Anthropic model, marks the system message as a
+            cacheable prompt prefix. OpenAI caches identical prefixes automatically.
         """
 
-        messages = self._create_message_block(system_message, user_message)
+        messages = self._create_message_block(
+            system_message, user_message, cache_system_message
+        )
         response = await acompletion(
             model=self.model_name,
             messages=messages,
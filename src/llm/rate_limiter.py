@@ -0,0 +1,100 @@
+import asyncio
+import os
+import time
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token) used for rate limit pacing."""
+    return len(text) // 4
+
+
+class AsyncTokenBucket:
+    """
+    Token bucket rate limiter that paces both requests per minute (RPM) and
+    tokens per minute (TPM) for a single executor. Requests are delayed until
+    enough capacity has been refilled, so throughput saturates the provider
+    limits without tripping 429 Rate Limit Errors.
+
+    The bucket holds no locks and performs no awaits between the refill and
+    the capacity check, so it is safe to share across coroutines (and event
+    loops) in a single thread.
+
+    Args:
+    -----
+    requests_per_minute: int | None
+        Provider RPM limit, None if requests are not limited.
+    tokens_per_minute: int | None
+        Provider TPM limit, None if tokens are not limited.
+    num_executors: int=1
+        Number of executors sharing the provider limits. Each executor is
+        allotted an equal share (RPM/E, TPM/E) of the overall capacity.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int | None,
+        tokens_per_minute: int | None,
+        num_executors: int = 1,
+    ) -> None:
+        if requests_per_minute is None and tokens_per_minute is None:
+            raise ValueError("At least one of the RPM or TPM limits must be set")
+        if any(
+            limit is not None and limit <= 0
+            for limit in (requests_per_minute, tokens_per_minute)
+        ):
+            raise ValueError("Rate limits must be greater than 0")
+        self.r = requests_per_minute / num_executors if requests_per_minute else None
+        self.t = tokens_per_minute / num_executors if tokens_per_minute else None
+        self.request_tokens = self.r or 0.0
+        self.token_tokens = self.t or 0.0
+        self.last_update = time.monotonic()
+
+    @classmethod
+    def from_env(
+        cls, prefix: str = "LLM", num_executors: int = 1
+    ) -> "AsyncTokenBucket | None":
+        """
+        Creates a bucket using the {prefix}_RPM_LIMIT and {prefix}_TPM_LIMIT
+        environment variables i.e. ANTHROPIC_RPM_LIMIT. Returns None if neither
+        limit is set, in which case requests are not paced.
+        """
+        rpm = os.getenv(f"{prefix}_RPM_LIMIT")
+        tpm = os.getenv(f"{prefix}_TPM_LIMIT")
+        if not rpm and not tpm:
+            return None
+        return cls(int(rpm) if rpm else None, int(tpm) if tpm else None, num_executors)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self.last_update
+        if self.r:
+            self.request_tokens = min(
+                self.r, self.request_tokens + elapsed * self.r / 60
+            )
+        if self.t:
+            self.token_tokens = min(self.t, self.token_tokens + elapsed * self.t / 60)
+        self.last_update = now
+
+    async def acquire(self, est_tokens: int = 0) -> None:
+        """
+        Waits until one request and est_tokens tokens are available, then
+        consumes them from the bucket. Unlimited dimensions are not checked.
+        """
+        # a single request can never need more than the full bucket
+        if self.t:
+            est_tokens = min(est_tokens, self.t)
+        while True:
+            self._refill()
+            has_request = not self.r or self.request_tokens >= 1
+            has_tokens = not self.t or self.token_tokens >= est_tokens
+            if has_request and has_tokens:
+                if self.r:
+                    self.request_tokens -= 1
+                if self.t:
+                    self.token_tokens -= est_tokens
+                return
+            wait_requests = (1 - self.request_tokens) * 60 / self.r if self.r else 0
+            wait_tokens = (
+                (est_tokens - self.token_tokens) * 60 / self.t if self.t else 0
+            )
+            await asyncio.sleep(max(wait_requests, wait_tokens, 0))
@@ -0,0 +1,112 @@
+import hashlib
+import os
+import sqlite3
+import time
+from enum import Enum
+
+
+class CachePolicy(Enum):
+    """
+    Controls how a ResponseCache is used:
+        enabled: read from and write to the cache
+        read-only: read from the cache, never write new responses
+        write-only: always call the API, write responses to the cache
+        replay: read from the cache and raise CacheMissError on a miss
+        disabled: bypass the cache entirely
+    """
+
+    enabled = "enabled"
+    read_only = "read-only"
+    write_only = "write-only"
+    replay = "replay"
+    disabled = "disabled"
+
+
+class CacheMissError(KeyError):
+    """Raised in replay mode when a response is not found in the cache."""
+
+
+class ResponseCache:
+    """
+    SQLite backed cache of LLM responses keyed on a SHA-256 hash of the
+    prompt and generation settings. Decouples inference from metric computation
+    i.e. in replay mode metric parameters can be iterated on without making any
+    API calls.
+
+    Args:
+    -----
+    path: str
+        Path to the SQLite database file. Defaults to the RESPONSE_CACHE_PATH
+        environment variable or ".response_cache.sqlite".
+    policy: CachePolicy | str
+        Cache policy, defaults to the CACHE_POLICY environment variable or "disabled".
+    """
+
+    def __init__(
+        self, path: str | None = None, policy: CachePolicy | str | None = None
+    ) -> None:
+        self.path = path or os.getenv("RESPONSE_CACHE_PATH", ".response_cache.sqlite")
+        self.policy = CachePolicy(policy or os.getenv("CACHE_POLICY", "disabled"))
+        self._conn: sqlite3.Connection | None = None
+
+    @staticmethod
+    def make_key(
+        prompt: str,
+        model: str,
+        provider: str,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+    ) -> bytes:
+        """Creates a deterministic cache key from the prompt and generation settings."""
+        return hashlib.sha256(
+            f"{prompt}|{model}|{provider}|{temperature}|{max_tokens}".encode()
+        ).digest()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key BLOB PRIMARY KEY,
+                    response TEXT,
+                    prompt_tokens INT,
+                    completion_tokens INT,
+                    ts REAL
+                )
+                """)
+        return self._conn
+
+    def get(self, key: bytes) -> str | None:
+        """
+        Returns the cached response for key or None on a miss.
+        Raises CacheMissError on a miss when policy is replay.
+        """
+        if self.policy in (CachePolicy.disabled, CachePolicy.write_only):
+            return None
+        row = (
+            self._connect()
+            .execute("SELECT response FROM responses WHERE key = ?", (key,))
+            .fetchone()
+        )
+        if row:
+            return row[0]
+        if self.policy == CachePolicy.replay:
+            raise CacheMissError(f"No cached response for key: {key.hex()}")
+        return None
+
+    def set(
+        self,
+        key: bytes,
+        response: str,
+        prompt_tokens: int | None = None,
+        completion_tokens: int | None = None,
+    ) -> None:
+        """Writes a response to the cache if the policy allows writes."""
+        if self.policy not in (CachePolicy.enabled, CachePolicy.write_only):
+            return
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+            (key, response, prompt_tokens, completion_tokens, time.time()),
+        )
+        conn.commit()
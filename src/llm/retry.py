@@ -0,0 +1,50 @@
+import anthropic
+import httpx
+import openai
+from cohere.core import ApiError as CohereApiError
+from tenacity import (
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+# HTTP status codes the provider SDKs retry by default (in addition to >= 500)
+RETRYABLE_STATUS_CODES = (408, 409, 429)
+
+# connection errors and timeouts, the cohere client raises plain httpx errors
+CONNECTION_ERRORS = (
+    anthropic.APIConnectionError,
+    openai.APIConnectionError,
+    httpx.TransportError,
+)
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """
+    Returns True for provider errors that are safe to retry: connection errors,
+    timeouts, and responses with a 408, 409, 429 or >= 500 status code (including
+    Anthropic 529 Overloaded and Cohere 504 Gateway Timeout). Mirrors the retry
+    rules of the provider SDKs, whose own retries are disabled.
+    """
+    if isinstance(error, CONNECTION_ERRORS):
+        return True
+    if isinstance(error, (anthropic.APIStatusError, openai.APIStatusError)):
+        status_code = error.status_code
+    elif isinstance(error, CohereApiError):
+        status_code = error.status_code
+    else:
+        return False
+    if status_code is None:
+        return False
+    return status_code in RETRYABLE_STATUS_CODES or status_code >= 500
+
+
+# provider SDK clients wrapped by this policy are created with their built-in
+# retries disabled (max_retries=0) so that retries are not stacked on top of it
+retry_on_transient_error = retry(
+    wait=wait_random_exponential(min=1, max=60),
+    stop=stop_after_attempt(6),
+    retry=retry_if_exception(is_transient_error),
+    reraise=True,
+)
@@ -0,0 +1,119 @@
+import json
+import os
+import threading
+from typing import Any, Callable
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+class SemanticCache:
+    """
+    Embedding similarity cache. A lookup returns the cached value of the most
+    similar previously cached query if their cosine similarity is greater than or
+    equal to threshold, so near-duplicate queries (whitespace changes, light
+    paraphrases) skip a full retrieval or LLM round trip.
+
+    Values are stored as JSON strings, every hit returns a fresh copy that can be
+    mutated safely (i.e. by the reranker). Lookups are a brute force matrix-vector
+    product over normalized embeddings, which is fast for evaluation sized caches.
+
+    Args:
+    -----
+    embed_fn: Callable[[str], list[float]]
+        Function that returns an embedding vector for a query.
+    threshold: float=0.97
+        Minimum cosine similarity for a cache hit.
+    path: str=None
+        Optional Parquet sidecar file used to persist the cache between runs.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[str], list[float]],
+        threshold: float = 0.97,
+        path: str | None = None,
+    ) -> None:
+        self.embed_fn = embed_fn
+        self.threshold = threshold
+        self.path = path
+        self._embeddings: np.ndarray | None = None
+        self._namespaces: list[str] = []
+        self._values: list[str] = []
+        self._lock = threading.Lock()
+        if self.path and os.path.exists(self.path):
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def embed(self, query: str) -> np.ndarray:
+        """Returns the L2 normalized embedding for query."""
+        embedding = np.asarray(self.embed_fn(query), dtype=np.float32)
+        return embedding / (np.linalg.norm(embedding) or 1.0)
+
+    def get(
+        self, query: str, namespace: str = "", embedding: np.ndarray | None = None
+    ) -> Any | None:
+        """
+        Returns the cached value for the most similar query within namespace or
+        None if no cached query meets the similarity threshold.
+        """
+        if self._embeddings is None:
+            return None
+        embedding = embedding if embedding is not None else self.embed(query)
+        with self._lock:
+            similarities = self._embeddings @ embedding
+            mask = np.array([ns == namespace for ns in self._namespaces])
+            similarities = np.where(mask, similarities, -np.inf)
+            idx = int(np.argmax(similarities))
+            if similarities[idx] < self.threshold:
+                return None
+            return json.loads(self._values[idx])
+
+    def set(
+        self,
+        query: str,
+        value: Any,
+        namespace: str = "",
+        embedding: np.ndarray | None = None,
+    ) -> None:
+        """Adds a query embedding and its value to the cache."""
+        embedding = embedding if embedding is not None else self.embed(query)
+        serialized = json.dumps(value, default=float)
+        with self._lock:
+            if self._embeddings is None:
+                self._embeddings = embedding[None, :]
+            else:
+                self._embeddings = np.vstack([self._embeddings, embedding])
+            self._namespaces.append(namespace)
+            self._values.append(serialized)
+
+    def save(self) -> None:
+        """Persists the cache to the Parquet sidecar file."""
+        if not self.path or self._embeddings is None:
+            return
+        with self._lock:
+            table = pa.table(
+                {
+                    "embedding": pa.array(
+                        list(self._embeddings), pa.list_(pa.float32())
+                    ),
+                    "namespace": pa.array(self._namespaces, pa.string()),
+                    "value": pa.array(self._values, pa.string()),
+                }
+            )
+        pq.write_table(table, self.path)
+
+    def load(self) -> None:
+        """Loads the cache from the Parquet sidecar file."""
+        table = pq.read_table(self.path)
+        if not table.num_rows:
+            return
+        with self._lock:
+            self._embeddings = np.array(
+                table.column("embedding").to_pylist(), dtype=np.float32
+            )
+            self._namespaces = table.column("namespace").to_pylist()
+            self._values = table.column("value").to_pylist()
@@ -79,7 +79,62 @@ class ReRanker(CrossEncoder):
         self._cross_encoder_score(
             results=results, query=query, apply_sigmoid=apply_sigmoid
         )
+        return self._sort_and_filter(results, top_k, threshold)
 
+    def rerank_many(
+        self,
+        query_results: list[tuple[str, list[dict]]],
+        top_k: int = 10,
+        apply_sigmoid: bool = True,
+        threshold: float | None = None,
+        hit_field: str = "content",
+        batch_size: int = 32,
+    ) -> list[list[dict]]:
+        """
+        Batched version of rerank for multiple queries. All (query, hit) pairs are
+        flattened and scored in a single CrossEncoder predict call, then split back
+        by query and sorted/filtered exactly like rerank.
+
+        Args:
+        -----
+        query_results : list[tuple[str, list[dict]]]
+            List of (query, results) pairs, where results are hits from the Weaviate client
+        top_k : int=10
+            Number of results to return per query
+        apply_sigmoid : bool=True
+            Whether to apply sigmoid activation to cross-encoder scores.
+        threshold : float=None
+            Minimum cross-encoder score to return. If no hits are above threshold,
+            returns top_k hits.
+        hit_field : str="content"
+            Results field that is scored against the query.
+        batch_size : int=32
+            Batch size used for the CrossEncoder forward passes.
+        """
+        activation_fn = self.activation_fn if apply_sigmoid else None
+        cross_inp = [
+            [query, hit[hit_field]]
+            for query, results in query_results
+            for hit in results
+        ]
+        if not cross_inp:
+            return [[] for _ in query_results]
+        cross_scores = self.predict(
+            cross_inp, activation_fn=activation_fn, batch_size=batch_size
+        )
+        reranked = []
+        offset = 0
+        for _, results in query_results:
+            for i, result in enumerate(results):
+                result[self.score_field] = cross_scores[offset + i]
+            offset += len(results)
+            reranked.append(self._sort_and_filter(results, top_k, threshold))
+        return reranked
+
+    def _sort_and_filter(
+        self, results: list[dict], top_k: int, threshold: float | None
+    ) -> list[dict]:
+        """Sorts scored results and limits them by either a threshold value or top_k."""
         sorted_hits = sorted(results, key=lambda x: x[self.score_field], reverse=True)
         if threshold or threshold == 0:
             filtered_hits = [